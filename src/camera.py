@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 """ Camera module.
 """
@@ -6,39 +6,75 @@
 import cv2
 import debug
 import math
+import slot
 import threading
-import Queue
+import queue
+import numpy as np
 
 
 class Camera(threading.Thread):
     """ Encapsulates the camera on the AR Parrot Drone 2.0. Handles the
         receiving of images from the drone using OpenCV.
     """
-    def __init__(self, debug_queue, error_queue, address, queue):
+    def __init__(self, debug_queue, error_queue, address, image_slot):
         threading.Thread.__init__(self)
         self.debug_queue = debug_queue
         self.error_queue = error_queue
         self.address = address
-        self.queue = queue
+        self.image_slot = image_slot
+
+        # Frames are decoded into a ring of reused buffers rather than a new
+        # array each. One buffer may be waiting in the slot and one held by
+        # the consumer, which the slot reports together, so three are enough
+        # to always have one free.
+        self.ring_size = 3
 
     def run(self):
         cap = self.get_cap()
+        ring = []
         while cap.isOpened():
-            (ret, frame) = cap.read()
+            buf = self.get_free_buffer(ring)
+            (ret, frame) = cap.read(buf)
             # If the image needs to converted to PIL, uncomment this line.
             # frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             if ret:
-                try:
-                    self.queue.put(frame, block=False)
-                except Queue.Full:
-                    pass
+                # OpenCV allocates a new frame whenever it does not fit the
+                # buffer (the first frame, or when the camera is changed), in
+                # which case the ring is rebuilt for the new size.
+                if frame is not buf:
+                    ring = [aligned_empty(frame.shape, frame.dtype) for i in range(0, self.ring_size)]
+                    ring[0][...] = frame
+                    frame = ring[0]
+
+                # Frames the consumer has not taken yet are simply replaced.
+                self.image_slot.put(frame)
             else:
                 cap.release()
 
+    def get_free_buffer(self, ring):
+        """ Gets a buffer of the ring which is neither waiting in the image
+            slot nor held by the consumer, or None if there is no ring yet.
+        """
+        (waiting, held) = self.image_slot.in_use()
+        for buf in ring:
+            if buf is not waiting and buf is not held:
+                return buf
+        return None
+
     def get_cap(self):
         return cv2.VideoCapture(self.address)
 
 
+def aligned_empty(shape, dtype, alignment=64):
+    """ Creates an empty array whose data starts on an alignment byte boundary.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape))*dtype.itemsize
+    raw = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -raw.ctypes.data % alignment
+    return raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
 def _test_camera():
     """ Tests the camera module.
     """
@@ -52,14 +88,14 @@ def _test_camera():
 def _test_get_image():
     # Set up debug.
     verbosity = 1
-    error_queue = Queue.Queue()
-    debug_queue = Queue.Queue()
+    error_queue = queue.Queue()
+    debug_queue = queue.Queue()
     debugger = debug.Debug(verbosity, debug_queue, error_queue)
 
     # Make sure the images look right.
-    image_queue = Queue.Queue(maxsize=1)
+    image_slot = slot.LatestSlot()
     camera_address = 'tcp://192.168.1.1:5555'
-    camera = Camera(debug_queue, error_queue, camera_address, image_queue)
+    camera = Camera(debug_queue, error_queue, camera_address, image_slot)
     camera.daemon = True
     camera.start()
 
@@ -67,7 +103,7 @@ def _test_get_image():
         i = 0
         while True:
             debugger.debug()
-            image = image_queue.get(block=True)
+            image = image_slot.get(block=True)
             cv2.imshow('image', image)
             key = cv2.waitKey(1) & 0xff
             if key == ord('q'):
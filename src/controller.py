@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 import debug
 import errno
@@ -17,12 +17,14 @@ class Controller(object):
             self.cmd_soc.connect(('localhost', 9000))
 
         except socket.error as e:
-            if e[0] == errno.ECONNREFUSED:
+            if e.errno == errno.ECONNREFUSED:
                 self.error_queue.put(debug.Error('controller', 'unable to connect to command server'))
-            if e[0] == errno.EPIPE:
+            if e.errno == errno.EPIPE:
                 self.error_queue.put(debug.Error('controller', 'bad pipe to command server'))
 
     def send_cmd(self, cmd):
+        """ Sends a command, already serialized to JSON bytes.
+        """
         self.cmd_soc.send(cmd)
 
 
@@ -31,8 +33,8 @@ def _test_controller():
 
     # Set up debug.
     verbosity = 1
-    error_queue = Queue.Queue()
-    debug_queue = Queue.Queue()
+    error_queue = queue.Queue()
+    debug_queue = queue.Queue()
     debugger = debug.Debug(verbosity, debug_queue, error_queue)
 
     # Set up controller
@@ -62,5 +64,5 @@ if __name__ == '__main__':
     import pdb
     import json
     import time
-    import Queue
+    import queue
     _test_controller()
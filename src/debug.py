@@ -1,9 +1,9 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 """ Debug module.
 """
 
-import Queue
+import queue
 import signal
 from contextlib import contextmanager
 
@@ -54,7 +54,7 @@ class Debug(object):
                 if msg is not None:
                     if msg['PRIORITY'] >= self.verbosity:
                         print(msg['MSG'])
-            except Queue.Empty:
+            except queue.Empty:
                 break
 
         # Get all messages in the error queue and print them out.
@@ -64,5 +64,5 @@ class Debug(object):
                 error = self.error_queue.get(block=False)
                 if error is not None:
                     raise error
-            except Queue.Empty:
+            except queue.Empty:
                 break
@@ -6,7 +6,7 @@ recvData = 0
 serverAddress = ('localhost', 9001)
 sock = soc.socket(soc.AF_INET, soc.SOCK_STREAM)
 sock.connect(serverAddress)
-sock.send('hello world')
+sock.send(b'hello world')
 recvData = sock.recv(size)
 
 # except socket.error as error:
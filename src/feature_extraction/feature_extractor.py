@@ -1,23 +1,24 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Feature extractor which extracts features in a thread.
 """
 
 import math
 import threading
-import Queue
+import queue
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 # Feature modules.
-import hough_transform
-import optical_flow
-import laws_mask
-import history
+from . import hough_transform
+from . import optical_flow
+from . import laws_mask
+from . import history
 
 
 class FeatureExtractor(object):
-    def __init__(self, feature_queue, init_image, window_size, overlap, cmd_history_feats, cmd_history_length, nav_history_feats, nav_history_length):
+    def __init__(self, feature_queue, init_image, window_size, overlap, cmd_history_feats, cmd_history_length, nav_history_feats, nav_history_length, flow_method='farneback'):
         self.feature_queue = feature_queue
         self.init_image = init_image
         self.window_size = window_size
@@ -26,71 +27,123 @@ class FeatureExtractor(object):
         self.cmd_history_length = cmd_history_length
         self.nav_history_feats = nav_history_feats
         self.nav_history_length = nav_history_length
+        self.flow_method = flow_method  # 'farneback' (dense) or 'lucas_kanade' (one vector per window)
         self.init_feature_extract()
 
     def extract(self, image):
         t = threading.Thread(target=self.get_features, args=(image,))
         t.start()
 
+    def close(self):
+        """ Shuts down the threads of the feature extractor.
+        """
+        self.pool.shutdown()
+
     def update(self, cmd, navdata):
         self.extractor_nav_history.update(navdata)
         self.extractor_cmd_history.update(cmd)
 
     def init_feature_extract(self):
-        # Grab an example window from the initial image to feed the optical flow
-        # feature extractor (use a non border window).
-        windows = get_windows(self.init_image, self.window_size, self.overlap)
-        small_image = self.init_image[windows[1][1][2]:windows[1][1][3], windows[1][1][0]:windows[1][1][1]]
-
         # Initialize each feature extractor.
-        self.extractor_opt_flow = optical_flow.OpticalFlow(small_image)
         self.extractor_hough_trans = hough_transform.HoughTransform()
         self.extractor_laws_mask = laws_mask.LawsMask()
         self.extractor_cmd_history = history.CmdHistory(self.cmd_history_feats, self.cmd_history_length)
         self.extractor_nav_history = history.NavHistory(self.nav_history_feats, self.nav_history_length)
 
+        # The visual feature extractors are independent of one another and
+        # spend most of their time in OpenCV code that releases the GIL, so
+        # run them in parallel on a pool of threads.
+        self.pool = ThreadPoolExecutor(max_workers=3)
+
+        # The windows and the optical flow extractor depend on the shape of
+        # the images.
+        self.init_windows(self.init_image)
+
+    def init_windows(self, image):
+        """ Computes the windows for images of the shape of image.
+        """
+        # Compute the windows once since every image until the camera
+        # changes has the same shape.
+        self.frame_shape = image.shape[:2]
+        (self.window_x0, self.window_x1, self.window_y0, self.window_y1) = get_windows_soa(image, self.window_size, self.overlap)
+
+        # The windows as they lie in the image padded so that every window
+        # fits at its nominal size. Grab an example window from the padded
+        # image to feed the optical flow feature extractor.
+        (self.padded_windows, self.padding, self.window_stride) = get_padded_windows(image, self.window_size, self.overlap)
+        (x0, x1, y0, y1) = self.padded_windows
+        small_image = self.pad_image(image)[y0[0]:y1[0], x0[0]:x1[0]]
+        if self.flow_method == 'lucas_kanade':
+            self.extractor_opt_flow = optical_flow.LucasKanade(small_image)
+        else:
+            self.extractor_opt_flow = optical_flow.OpticalFlow(small_image)
+        self.visual_extractors = (self.extractor_opt_flow, self.extractor_hough_trans, self.extractor_laws_mask)
+
+    def pad_image(self, image):
+        """ Pads the image by replicating its edges so every window fits.
+        """
+        (top, bottom, left, right) = self.padding
+        return cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_REPLICATE)
+
+    def get_window_batch(self, image):
+        """ Gathers the windows of the image, in row-major order, into a single
+            contiguous array of shape (N, r, c, d).
+        """
+        # The strided view below is only within the padded image if the image
+        # has the shape that the windows were computed for.
+        if image.shape[:2] != self.frame_shape:
+            raise ValueError('image of shape %s does not match the windows, computed for shape %s' % (image.shape[:2], self.frame_shape))
+
+        # In the padded image every window has the same size and lies at a
+        # fixed stride from its neighbors, so all of them can be copied at
+        # once from a single strided view.
+        (cols, rows) = self.window_size
+        (r, c) = self.extractor_opt_flow.shape
+        (stride_x, stride_y) = self.window_stride
+        padded = self.pad_image(image)
+        d = padded.shape[2]
+        strides = padded.strides
+        windows = np.lib.stride_tricks.as_strided(padded,
+                                                  shape=(rows, cols, r, c, d),
+                                                  strides=(stride_y*strides[0], stride_x*strides[1]) + strides)
+        return np.ascontiguousarray(windows).reshape((rows*cols, r, c, d))
+
     def get_visual_features(self, image):
-        # Get the windows from the current image.
-        windows = get_windows(image, self.window_size, self.overlap)
-
-        # Arrays that will contain the different features.
-        feats_all = np.array([])
-        feats_flow = np.array([])
-        feats_hough = np.array([])
-        feats_laws = np.array([])
-
-        # Iterate through the windows, computing features for each.
-        for r in range(0, self.window_size[1]):
-            for c in range(0, self.window_size[0]):
-                # Get the current window of the image for which the features
-                # will be extracted from.
-                cur_window = image[windows[r][c][2]:windows[r][c][3], windows[r][c][0]:windows[r][c][1]]
-
-                # If the current window is a border window, it may have a
-                # smaller size, so reshape it.
-                cur_window = cv2.resize(cur_window, self.extractor_opt_flow.shape[::-1])
-
-                # Get the optical flow features from the current window.
-                flow = self.extractor_opt_flow.extract(cur_window)
-                feats_cur = optical_flow.OpticalFlow.get_features(flow)
-                feats_flow = np.vstack((feats_flow, feats_cur)) if feats_flow.size else feats_cur
-
-                # Get the Hough transform features from the current window.
-                lines = self.extractor_hough_trans.extract(cur_window)
-                feats_cur = hough_transform.HoughTransform.get_features(lines)
-                feats_hough = np.vstack((feats_hough, feats_cur)) if feats_hough.size else feats_cur
-
-                # Get the Law's texture mask features from the current window.
-                feats_cur = self.extractor_laws_mask.extract(cur_window)
-                feats_laws = np.vstack((feats_laws, feats_cur)) if feats_laws.size else feats_cur
-
-        # Vertically stack all of the different features.
-        feats_all = np.vstack((feats_all, feats_flow)) if feats_all.size else feats_flow
-        feats_all = np.vstack((feats_all, feats_hough)) if feats_all.size else feats_hough
-        feats_all = np.vstack((feats_all, feats_laws)) if feats_all.size else feats_laws
-
-        # Transpose and return.
-        return np.transpose(feats_all)
+        # The cached windows only fit images of the shape they were computed
+        # for, so recompute them when the camera changes. The optical flow
+        # starts over from this image.
+        if image.shape[:2] != self.frame_shape:
+            self.init_windows(image)
+
+        # The Lucas-Kanade optical flow works on the whole image. The
+        # Farneback optical flow needs the windows of the image in a batch.
+        windows = (self.window_x0, self.window_x1, self.window_y0, self.window_y1)
+        if self.flow_method == 'lucas_kanade':
+            flow_job = (self.extractor_opt_flow.frame_extract, (image, windows))
+        else:
+            flow_job = (self.extractor_opt_flow.batch_extract, (self.get_window_batch(image),))
+
+        # The features are laid out in a single row: the optical flow
+        # features of every window, followed by the Hough transform and Law's
+        # mask features. Allocate the row once and let each extractor fill its
+        # own section, one row of the section per window.
+        n = windows[0].shape[0]
+        feats_all = np.empty((1, n*sum(e.dim for e in self.visual_extractors)), dtype=np.float32)
+        outs = []
+        start = 0
+        for extractor in self.visual_extractors:
+            end = start + n*extractor.dim
+            outs.append(feats_all[0, start:end].reshape((n, extractor.dim)))
+            start = end
+
+        futures = [self.pool.submit(flow_job[0], *flow_job[1], out=outs[0]),
+                   self.pool.submit(self.extractor_hough_trans.frame_extract, image, windows, out=outs[1]),
+                   self.pool.submit(self.extractor_laws_mask.frame_extract, image, windows, out=outs[2])]
+
+        # Wait for all of the extractors to finish (re-raising any errors).
+        for future in futures:
+            future.result()
+        return feats_all
 
     def get_nav_features(self):
         # Get the command and navigation data history features.
@@ -115,7 +168,7 @@ def get_windows(image, window_size, percent_overlap):
         neighbors is given by percent_overlap.
     """
     (y, x, d) = image.shape
-    length = (x/window_size[0], y/window_size[1])
+    length = (x//window_size[0], y//window_size[1])
     overlap = (int(math.floor(length[0]*percent_overlap/4)), int(math.floor(length[1]*percent_overlap/4)))
 
     # Matrix that will hold the window sizes.
@@ -132,10 +185,42 @@ def get_windows(image, window_size, percent_overlap):
     return windows
 
 
-def _test_feature_extractor():
-    pdb.set_trace()
+def get_windows_soa(image, window_size, percent_overlap):
+    """ Gets the windows of get_windows as flat int32 arrays (x0, x1, y0, y1)
+        in row-major order, with the ends clipped to the image.
+    """
+    (y, x, _) = image.shape
+    windows = np.array(get_windows(image, window_size, percent_overlap), dtype=np.int32)
+    windows.shape = (windows.shape[0]*windows.shape[1], 4)
+    x0 = np.ascontiguousarray(windows[:, 0])
+    x1 = np.minimum(windows[:, 1], x)
+    y0 = np.ascontiguousarray(windows[:, 2])
+    y1 = np.minimum(windows[:, 3], y)
+    return (x0, x1, y0, y1)
+
+
+def get_padded_windows(image, window_size, percent_overlap):
+    """ Gets the unclipped windows (x0, x1, y0, y1) in the padded image, the
+        (top, bottom, left, right) padding and the (x, y) window stride.
+    """
+    (y, x, _) = image.shape
+    (cols, rows) = window_size
+    length = (x//cols, y//rows)
+    overlap = (int(math.floor(length[0]*percent_overlap/4)), int(math.floor(length[1]*percent_overlap/4)))
+    # Pad enough for the windows overhanging the image edges to fit.
+    padding = (overlap[1], max(rows*length[1] + overlap[1] - y, 0), overlap[0], max(cols*length[0] + overlap[0] - x, 0))
 
-    feature_queue = Queue.Queue(maxsize=1)
+    # Window starts shifted by the top and left padding.
+    (r, c) = np.indices((rows, cols), dtype=np.int32)
+    x0 = (length[0]*c).ravel()
+    y0 = (length[1]*r).ravel()
+    x1 = x0 + length[0] + 2*overlap[0]
+    y1 = y0 + length[1] + 2*overlap[1]
+    return ((x0, x1, y0, y1), padding, length)
+
+
+def _test_feature_extractor():
+    feature_queue = queue.Queue(maxsize=1)
     init_image = cv2.imread('../samples/test_forest.jpg')
     window_size = (10, 5)
     overlap = 0.25
@@ -152,21 +237,48 @@ def _test_feature_extractor():
                           cmd_history_length,
                           nav_history_feats,
                           nav_history_length)
-    
-    pdb.set_trace()
-    fe.extract(init_image, '', '')
-
-    while True:
-        blah = None
-        try:
-            blah = feature_queue.get(block=False)
-        except Queue.Empty:
-            pass
-        if blah is not None:
-            break
 
+    # The features of the image arrive on the queue from another thread.
+    fe.extract(init_image)
+    feats = feature_queue.get(timeout=60)
+    assert feats.shape[0] == 1
+    fe.close()
+    print('Success.')
+
+
+def _test_get_visual_features():
+    # Use a smoothed synthetic image so that the test does not depend on the
+    # samples but still has texture to follow.
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (360, 640, 3), dtype=np.uint8), (7, 7), 2)
+    window_size = (10, 5)
+    overlap = 0.25
+    n = window_size[0]*window_size[1]
+    for flow_method in ('farneback', 'lucas_kanade'):
+        fe = FeatureExtractor(queue.Queue(maxsize=1), image, window_size, overlap, 7, 10, 7, 10, flow_method=flow_method)
+
+        # Make sure every window gets all of its features, and that the flow
+        # is zero on the first frame and not on the shifted frames after it.
+        # Farneback leaves a small residual flow even between equal frames.
+        dim = sum(e.dim for e in fe.visual_extractors)
+        flow_dim = fe.extractor_opt_flow.dim
+        for i in range(0, 3):
+            feats = fe.get_visual_features(np.roll(image, i, axis=1))
+            assert feats.shape == (1, n*dim)
+            assert np.all(np.isfinite(feats))
+            flow = np.mean(np.abs(feats[0, :n*flow_dim]))
+            assert flow < 0.05 if i == 0 else flow > 0.1
+
+        # Images of another shape get their own windows, with the flow
+        # starting over.
+        small = np.ascontiguousarray(image[:240, :320])
+        feats = fe.get_visual_features(small)
+        assert feats.shape == (1, n*dim)
+        assert np.all(np.isfinite(feats))
+        assert np.mean(np.abs(feats[0, :n*flow_dim])) < 0.05
+        fe.close()
     print('Success.')
 
 if __name__ == '__main__':
-    import pdb
     _test_feature_extractor()
+    _test_get_visual_features()
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Extracts hough transform features from the drone.
 """
@@ -10,6 +10,8 @@ import cv2
 class HoughTransform(object):
     """ Extracts Hough transform features.
     """
+    dim = 4  # number of features per window
+
     def __init__(self):
         # Parameters for the Hough transform.
         self.min_line_length = 100  # max length of each line in pixels
@@ -29,19 +31,89 @@ class HoughTransform(object):
         self.can_thresh2 = 100
         self.aperature_size = 3
 
+        # Use the GPU for the Hough transform of whole images if OpenCV was
+        # built with CUDA and there is a device to run on. It takes the same
+        # parameters as the CPU's HoughLinesP, including the vote threshold.
+        self.use_cuda = hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+        if self.use_cuda:
+            self.cuda_detector = cv2.cuda.createHoughSegmentDetector(self.rho,
+                                                                     self.theta,
+                                                                     minLineLength=self.min_line_length,
+                                                                     maxLineGap=self.max_line_gap,
+                                                                     threshold=self.hough_thresh)
+
     def extract(self, img):
         """ Applies the Hough transform to the image to find lines in it.
         """
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         edges = cv2.Canny(gray, self.can_thresh1, self.can_thresh2, apertureSize=self.aperature_size)
-        lines = cv2.HoughLinesP(edges, self.rho, self.theta, self.hough_thresh, self.min_line_length, self.max_line_gap)
+        lines = cv2.HoughLinesP(edges, self.rho, self.theta, self.hough_thresh, minLineLength=self.min_line_length, maxLineGap=self.max_line_gap)
         return lines
 
+    def frame_extract(self, image, windows, out=None):
+        """ Extracts the Hough transform features of every window
+            (x0, x1, y0, y1) of an image at once.
+        """
+        (x0, x1, y0, y1) = windows
+        n = x0.shape[0]
+        features = np.empty((n, self.dim)) if out is None else out
+        features[:] = 0
+        lines = self.get_lines(image)
+        if lines.shape[0] == 0:
+            return features
+
+        # Clip every line to every window (Liang-Barsky), keeping the part of
+        # the line from t0 to t1 along it.
+        (xs, ys) = (lines[:, 0].astype(np.float64), lines[:, 1].astype(np.float64))
+        (dx, dy) = (lines[:, 2] - xs, lines[:, 3] - ys)
+        t0 = np.zeros((n, lines.shape[0]))
+        t1 = np.ones((n, lines.shape[0]))
+        valid = np.ones((n, lines.shape[0]), dtype=bool)
+        bounds = ((-dx, xs - x0[:, np.newaxis]), (dx, x1[:, np.newaxis] - xs),
+                  (-dy, ys - y0[:, np.newaxis]), (dy, y1[:, np.newaxis] - ys))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for (p, q) in bounds:
+                t = q/p
+                t0 = np.where(p < 0, np.maximum(t0, t), t0)
+                t1 = np.where(p > 0, np.minimum(t1, t), t1)
+                valid &= (p != 0) | (q >= 0)
+        valid &= t0 < t1
+
+        # Each window takes its longest clipped line, or zeros if no line
+        # crosses it, with its end points relative to the window's top left
+        # corner and normalized by the window's size.
+        length = np.where(valid, (t1 - t0)*np.hypot(dx, dy), -1)
+        found = valid.any(axis=1)
+        k = length.argmax(axis=1)
+        i = np.arange(n)
+        (t0, t1, dx, dy) = (t0[i, k], t1[i, k], dx[k], dy[k])
+        (w, h) = (x1 - x0, y1 - y0)
+        clipped = np.column_stack(((xs[k] + t0*dx - x0)/w, (ys[k] + t0*dy - y0)/h,
+                                   (xs[k] + t1*dx - x0)/w, (ys[k] + t1*dy - y0)/h))
+        features[found] = np.clip(clipped, 0, 1)[found]
+        return features
+
+    def get_lines(self, img):
+        """ Finds the line segments in a whole image, returning an (L, 4)
+            array of their end points.
+        """
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(gray, self.can_thresh1, self.can_thresh2, apertureSize=self.aperature_size)
+        if self.use_cuda:
+            gpu_edges = cv2.cuda_GpuMat()
+            gpu_edges.upload(edges)
+            lines = self.cuda_detector.detect(gpu_edges).download()
+        else:
+            lines = cv2.HoughLinesP(edges, self.rho, self.theta, self.hough_thresh, minLineLength=self.min_line_length, maxLineGap=self.max_line_gap)
+        if lines is None:
+            return np.zeros((0, 4), dtype=np.int32)
+        return lines.reshape((-1, 4)).astype(np.int32)
+
     @staticmethod
     def get_image(img, lines):
         """ Draws the lines found by Hough transform extractor on the image.
         """
-        for x1, y1, x2, y2 in lines[0]:
+        for (x1, y1, x2, y2) in lines.reshape((-1, 4)):
             cv2.line(img, (x1, y1), (x2, y2), (255, 0, 0), 2)
         return img
 
@@ -68,7 +140,7 @@ def _test_hough_transform():
     pdb.set_trace()
     test_filename = './../samples/test_hough.jpg'
 
-    image = cv2.imread(test_filename, cv2.CV_LOAD_IMAGE_COLOR)
+    image = cv2.imread(test_filename, cv2.IMREAD_COLOR)
     hough_transform = HoughTransform()
     lines = hough_transform.extract(image)
     image = HoughTransform.get_image(image, lines)
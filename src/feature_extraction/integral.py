@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+""" Sums over the windows of an image using integral images.
+"""
+
+import cv2
+
+
+def window_sums(S, windows):
+    """ Sums an image over every window at once given its integral image S
+        and the tuple (x0, x1, y0, y1) of flat window arrays.
+    """
+    (x0, x1, y0, y1) = windows
+    return S[y1, x1] - S[y0, x1] - S[y1, x0] + S[y0, x0]
+
+
+def integral_window_sums(image, windows):
+    """ Sums a single channel float32 image over every window at once.
+    """
+    return window_sums(cv2.integral(image, sdepth=cv2.CV_64F), windows)
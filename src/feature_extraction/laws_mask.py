@@ -1,4 +1,4 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Extracts Law's mask features from the drone.
 """
@@ -6,10 +6,14 @@
 import numpy as np
 import cv2
 
+from .integral import window_sums
+
 
 class LawsMask(object):
     """ Law's Mask features.
     """
+    dim = 8  # number of features per window
+
     def __init__(self):
         # Create the initial laws mask vectors.
         L3 = np.transpose(np.array([1, 2, 1]))
@@ -34,6 +38,13 @@ class LawsMask(object):
         self.ES5 = np.convolve(E5, np.transpose(S5))
         self.SS5 = np.convolve(S5, np.transpose(S5))
 
+        # Separable integer versions of the 3x3 masks, for filtering whole
+        # images. Each is a (vertical, horizontal) pair of kernels whose outer
+        # product is the mask, in the order of the features, except that the
+        # three LL features share the first.
+        (l3, e3, s3) = (np.int16(L3), np.int16(E3), np.int16(S3))
+        self.separable_masks = ((l3, l3), (l3, e3), (l3, s3), (e3, e3), (e3, s3), (s3, s3))
+
     def extract(self, image, filter_size=5, convert=False):
         """ Extract Law's texture masks from the image. Make sure the image is
             in the YCrCb color space before calling this function.
@@ -67,9 +78,35 @@ class LawsMask(object):
         features.shape = (features.shape[0], 1)
         return features
 
+    def frame_extract(self, image, windows, out=None):
+        """ Extracts the Law's texture mask features of every window
+            (x0, x1, y0, y1) of an image at once.
+        """
+        (x0, x1, y0, y1) = windows
+        n = x0.shape[0]
+        Y = np.ascontiguousarray(image[..., 0])
+        area = (x1 - x0)*(y1 - y0)
+
+        energies = np.empty((len(self.separable_masks), n))
+        for k in range(0, len(self.separable_masks)):
+            (ky, kx) = self.separable_masks[k]
+            # The energy of a window is its mean absolute response, read from
+            # the integral image with four lookups.
+            response = cv2.sepFilter2D(Y, cv2.CV_16S, kx, ky)
+
+            # The absolute response always fits in a uint16, which (unlike an
+            # int16) cv2.integral accepts.
+            S = cv2.integral(np.abs(response).view(np.uint16), sdepth=cv2.CV_64F)
+            energies[k] = window_sums(S, windows)/area
+
+        # Construct the feature matrix.
+        features = np.empty((n, self.dim)) if out is None else out
+        features[:] = np.transpose(energies[[0, 0, 0, 1, 2, 3, 4, 5]])
+        return features
+
 
 def _test_laws_mask():
-    sample_img_filenames = ['../../samples/test_forest.jpg']
+    sample_img_filenames = ['../samples/test_forest.jpg']
     sample_img = cv2.imread(sample_img_filenames[0])
     laws_mask = LawsMask()
     features = laws_mask.extract(sample_img)
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Extracts optical flow features from the drone.
 """
@@ -6,6 +6,18 @@
 import numpy as np
 import cv2
 
+from .integral import window_sums, integral_window_sums
+
+try:
+    from numba import njit
+    have_numba = True
+except ImportError:
+    # Without numba the flow is summed with OpenCV instead.
+    have_numba = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 
 class OpticalFlow(object):
     """ Extracts dense optical flow features from an image and its predecessor
@@ -22,11 +34,14 @@ class OpticalFlow(object):
         Source: [M. Werlberger, T. Pock, and H. Bischof. Motion estimation with
         non-local total variation regularization. In CVPR, 2010.]
     """
+    dim = 5  # number of features per window
+
     def __init__(self, init_frame):
         # Parameters of the camera/images.
         (r, c, _) = init_frame.shape
         self.shape = (r, c)
         self.prev_gray = cv2.cvtColor(init_frame, cv2.COLOR_BGR2GRAY)
+        self.prev_batch = None
 
         # Parameters for farneback optical flow.
         self.pyr_scale = 0.5   # next layer is twice smaller than the previous
@@ -45,6 +60,7 @@ class OpticalFlow(object):
         cur_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         flow = cv2.calcOpticalFlowFarneback(self.prev_gray,
                                             cur_gray,
+                                            None,
                                             pyr_scale=self.pyr_scale,
                                             levels=self.levels,
                                             winsize=self.winsize,
@@ -55,6 +71,32 @@ class OpticalFlow(object):
         self.prev_gray = cur_gray
         return flow
 
+    def batch_extract(self, windows, out=None):
+        """ Extracts the optical flow features from a batch of windows of
+            shape (N, r, c, 3), comparing each with the previous batch.
+        """
+        # Convert the whole batch to gray in one call.
+        (n, r, c, d) = windows.shape
+        cur_batch = cv2.cvtColor(windows.reshape((n*r, c, d)), cv2.COLOR_BGR2GRAY).reshape((n, r, c))
+        if self.prev_batch is None:
+            self.prev_batch = cur_batch
+
+        features = np.empty((n, self.dim)) if out is None else out
+        for i in range(0, n):
+            flow = cv2.calcOpticalFlowFarneback(self.prev_batch[i],
+                                                cur_batch[i],
+                                                None,
+                                                pyr_scale=self.pyr_scale,
+                                                levels=self.levels,
+                                                winsize=self.winsize,
+                                                iterations=self.iterations,
+                                                poly_n=self.poly_n,
+                                                poly_sigma=self.poly_sigma,
+                                                flags=self.flags)
+            features[i] = OpticalFlow.get_features(flow)[:, 0]
+        self.prev_batch = cur_batch
+        return features
+
     @staticmethod
     def get_image(flow):
         """ Extracts a viewable image from the flow matrix.
@@ -107,6 +149,110 @@ class OpticalFlow(object):
         return features
 
 
+class LucasKanade(object):
+    """ Extracts a single optical flow vector for each window of an image and
+        its predecessor using the Lucas-Kanade method, which solves for the
+        flow that best explains the change in the window.
+
+        Source: [B. D. Lucas and T. Kanade, An iterative image registration
+        technique with an application to stereo vision, Proceedings of the
+        7th International Joint Conference on Artificial Intelligence, 1981,
+        674-679.]
+    """
+    dim = 2  # number of features per window
+
+    def __init__(self, init_frame):
+        # Parameters of the camera/images.
+        (r, c, _) = init_frame.shape
+        self.shape = (r, c)
+        self.prev_frame = None
+        self.integrals = None
+
+        # Parameters for solving the flow of each window.
+        self.min_eigenvalue = 1.0  # smallest eigenvalue of the structure tensor per pixel of the window for its flow to be solved
+
+    def frame_extract(self, image, windows, out=None):
+        """ Extracts the flow vector (u, v) of every window (x0, x1, y0, y1) of
+            an image at once, comparing it against the previous image.
+        """
+        cur_frame = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if self.prev_frame is None or self.prev_frame.shape != cur_frame.shape:
+            self.prev_frame = cur_frame
+
+        # Sum the structure tensor [a, b; b, d] and right hand side [bx; by]
+        # over each window, from the integral images of the five products of
+        # the unscaled integer Sobel and temporal gradients.
+        if have_numba:
+            (r, c) = cur_frame.shape
+            if self.integrals is None or self.integrals.shape != (5, r + 1, c + 1):
+                self.integrals = np.zeros((5, r + 1, c + 1))
+            lk_integrals(self.prev_frame, cur_frame, self.integrals)
+            sums = [window_sums(S, windows) for S in self.integrals]
+        else:
+            gx = cv2.Sobel(cur_frame, cv2.CV_16S, 1, 0, ksize=3)
+            gy = cv2.Sobel(cur_frame, cv2.CV_16S, 0, 1, ksize=3)
+            gt = cv2.subtract(cur_frame, self.prev_frame, dtype=cv2.CV_16S)
+
+            # Products of the int16 gradients are below 2**24, so they are
+            # exact in float32, and so are their float64 window sums.
+            sums = [integral_window_sums(cv2.multiply(f, g, dtype=cv2.CV_32F), windows)
+                    for (f, g) in ((gx, gx), (gx, gy), (gy, gy), (gx, gt), (gy, gt))]
+        self.prev_frame = cur_frame
+
+        # Scale the spatial gradients by the 1/8 of the Sobel kernel to per
+        # pixel units.
+        (a, b, d) = (sums[0]/64.0, sums[1]/64.0, sums[2]/64.0)
+        (bx, by) = (-sums[3]/8.0, -sums[4]/8.0)
+
+        # Solve each system, giving zero flow to the windows without enough
+        # texture to solve for it, i.e. whose structure tensor has a small
+        # eigenvalue (flat windows, or edges along which the flow is unknown).
+        (x0, x1, y0, y1) = windows
+        area = (x1 - x0)*(y1 - y0)
+        eigenvalue = (a + d)/2 - np.sqrt(((a - d)/2)**2 + b*b)
+        solvable = eigenvalue > self.min_eigenvalue*area
+        det = a*d - b*b
+        det[~solvable] = 1
+        features = np.empty((a.shape[0], self.dim)) if out is None else out
+        features[:, 0] = np.where(solvable, (d*bx - b*by)/det, 0)
+        features[:, 1] = np.where(solvable, (a*by - b*bx)/det, 0)
+        return features
+
+
+@njit(nogil=True, cache=True)
+def lk_integrals(prev, cur, S):
+    """ Computes the integral images S of the five gradient products gx*gx,
+        gx*gy, gy*gy, gx*gt and gy*gt in a single pass over the gray images.
+    """
+    # The Sobel gradients are taken on the fly, with the border reflected
+    # like cv2.Sobel's default, so that no gradient image is stored.
+    (r, c) = cur.shape
+    for i in range(0, r):
+        iu = i - 1 if i > 0 else 1
+        il = i + 1 if i < r - 1 else r - 2
+
+        # Running sums of the products along the row.
+        (a, b, d, bx, by) = (0.0, 0.0, 0.0, 0.0, 0.0)
+        for j in range(0, c):
+            jl = j - 1 if j > 0 else 1
+            jr = j + 1 if j < c - 1 else c - 2
+            x = (float(cur[iu, jr]) - float(cur[iu, jl]) + 2.0*(float(cur[i, jr]) - float(cur[i, jl])) +
+                 float(cur[il, jr]) - float(cur[il, jl]))
+            y = (float(cur[il, jl]) - float(cur[iu, jl]) + 2.0*(float(cur[il, j]) - float(cur[iu, j])) +
+                 float(cur[il, jr]) - float(cur[iu, jr]))
+            t = float(cur[i, j]) - float(prev[i, j])
+            a += x*x
+            b += x*y
+            d += y*y
+            bx += x*t
+            by += y*t
+            S[0, i + 1, j + 1] = S[0, i, j + 1] + a
+            S[1, i + 1, j + 1] = S[1, i, j + 1] + b
+            S[2, i + 1, j + 1] = S[2, i, j + 1] + d
+            S[3, i + 1, j + 1] = S[3, i, j + 1] + bx
+            S[4, i + 1, j + 1] = S[4, i, j + 1] + by
+
+
 def _test_optical_flow():
     pdb.set_trace()
     test_filename = './../samples/test_cat.mp4'
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Extracts the radon transform features from the drone.
 """
@@ -37,9 +37,9 @@ class RadonTransform(object):
 
 def _test_radon_transform():
     pdb.set_trace()
-    test_filename = './../../samples/test_forest.jpg'
+    test_filename = './../samples/test_forest.jpg'
 
-    image = cv2.imread(test_filename, cv2.CV_LOAD_IMAGE_COLOR)
+    image = cv2.imread(test_filename, cv2.IMREAD_COLOR)
     radon_transform = RadonTransform(image)
     sinogram = radon_transform.extract(image)
 
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 """ Fly module.
 
@@ -13,9 +13,9 @@ import math
 import sys
 import time
 import traceback
-import Queue
+import queue
 import numpy as np
-import Tkinter as tk
+import tkinter as tk
 from PIL import ImageTk, Image
 
 # Igor's modules.
@@ -23,6 +23,7 @@ import args
 import debug
 import parrot
 import remote
+import slot
 import tracking
 from tools import annotate
 from feature_extraction import feature_extractor
@@ -40,8 +41,8 @@ class FlyTool(object):
         self.gui = args.gui
         self.verbosity = args.verbosity
 
-        self.debug_queue = Queue.Queue()
-        self.error_queue = Queue.Queue()
+        self.debug_queue = queue.Queue()
+        self.error_queue = queue.Queue()
         self.debugger = debug.Debug(self.verbosity, self.debug_queue, self.error_queue)
 
         if args.command == 'train':
@@ -101,7 +102,7 @@ class FlyTool(object):
                                    self.iteration,
                                    self.trajectory)
 
-        self.feature_queue = Queue.Queue(maxsize=1)
+        self.feature_queue = slot.LatestSlot()
         init_image = self.drone.get_image()
         self.feature_extractor = feature_extractor.FeatureExtractor(self.feature_queue,
                                                                     init_image,
@@ -143,7 +144,7 @@ class FlyTool(object):
             emergency_cmd = self.drone.get_cmd()
             if emergency_cmd is not None:
                 if emergency_cmd['L']:
-                    self.drone.send_cmd(self.drone.remote.land())
+                    self.drone.land()
                     break
 
             image_filename = directory + '%s.jpg' % self.time_step
@@ -166,7 +167,7 @@ class FlyTool(object):
                     self.save_cmd(expert_cmd, cmd_filename)
                     self.time_step += 1
                     feature_flag = False
-                except Queue.Empty:
+                except queue.Empty:
                     pass
                 self.drone.send_cmd(expert_cmd)
             else:
@@ -197,9 +198,10 @@ class FlyTool(object):
 
                     self.drone.send_cmd(cmd)
                     feature_flag = False
-                except Queue.Empty:
+                except queue.Empty:
                     pass
-                
+        self.feature_extractor.close()
+
     def test(self, args):
         pass
 
@@ -288,7 +290,7 @@ class FlyTool(object):
             # Display the image.
             if annotated_image is not None:
                 pil_frame = Image.fromarray(annotated_image)
-                pil_frame = pil_frame.resize((400, 300), Image.ANTIALIAS)
+                pil_frame = pil_frame.resize((400, 300), Image.LANCZOS)
                 photo_frame = ImageTk.PhotoImage(pil_frame)
                 self.image_label.config(image=photo_frame)
                 self.image_label.image = photo_frame
@@ -300,7 +302,7 @@ class FlyTool(object):
                 self.time_step += 1
                 self.debug_flag = False
 
-        except Queue.Empty:
+        except queue.Empty:
             pass
 
     def save_features(self, features, filename):
@@ -7,15 +7,25 @@
 
 import cv2
 import json
-import Queue
 import numpy as np
 
+try:
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    # Without orjson fall back to the (slower) standard library encoder.
+    def dumps(obj):
+        return json.dumps(obj).encode()
+
 # Local modules.
 import remote
 import camera
 import controller
 import debug
 import receiver
+import slot
 
 # Tracking modules.
 from tracking import bounding_box
@@ -49,6 +59,10 @@ class Parrot(object):
             'S': False
         }
 
+        # Serialize the land command once, as the bytes sent to the
+        # controller, since it is sent as is.
+        self.land_json = self.get_cmd_json('L', True)
+
         # The drone's address and ports.
         self.drone_address = '192.168.1.1'
         self.ports = {
@@ -75,8 +89,8 @@ class Parrot(object):
         self.receiver = receiver.Receiver(self.debug_queue, self.error_queue)
 
         camera_address = 'tcp://' + self.drone_address + ':' + str(self.ports['VIDEO'])
-        self.image_queue = Queue.Queue(maxsize=1)
-        self.camera = camera.Camera(self.debug_queue, self.error_queue, camera_address, self.image_queue)
+        self.image_slot = slot.LatestSlot()
+        self.camera = camera.Camera(self.debug_queue, self.error_queue, camera_address, self.image_slot)
         self.camera.daemon = True
         self.camera.start()
 
@@ -85,7 +99,11 @@ class Parrot(object):
         return navdata
 
     def get_image(self):
-        image = self.image_queue.get(block=True)
+        """ Gets the latest image from the camera. The image is a buffer that
+            the camera reuses, so it is only valid until the next call; copy it
+            to keep it for longer.
+        """
+        image = self.image_slot.get(block=True)
         return image
 
     def get_cmd(self):
@@ -93,9 +111,21 @@ class Parrot(object):
         return cmd
 
     def send_cmd(self, cmd):
-        cmd_json = json.dumps(cmd)
+        cmd_json = dumps(cmd)
         self.controller.send_cmd(cmd_json)
 
+    def get_cmd_json(self, key, value):
+        """ Serializes the default command with the given key set to value
+            into bytes.
+        """
+        cmd = self.default_cmd.copy()
+        cmd[key] = value
+        return dumps(cmd)
+
+    def land(self):
+        self.debug_queue.put({'MSG': 'Sending command to land.', 'PRIORITY': 1})
+        self.controller.send_cmd(self.land_json)
+
     def exit(self):
         """ Lands the drone, closes all cv windows and exits.
         """
@@ -117,19 +147,21 @@ def _test_parrot():
     parrot.init_receiver(nav_rate)
     parrot.init_feature_extract()
 
-    while True:
-        image = parrot.get_image()
-        parrot.get_navdata()
-
-        visual_features = parrot.get_visual_features()
-        # nav_features = parrot.get_nav_features()
-        with open('feat.dat', 'a') as out:
-            np.savetxt(out, visual_features)
-
-        cv2.imshow('Image', image)
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
+    # Dump the features of each frame as a binary .npy record, read back by
+    # calling np.load on the open file until it runs out.
+    with open('feat.dat', 'ab') as out:
+        while True:
+            image = parrot.get_image()
+            parrot.get_navdata()
+
+            visual_features = parrot.get_visual_features()
+            # nav_features = parrot.get_nav_features()
+            np.save(out, visual_features)
+
+            cv2.imshow('Image', image)
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
 
 if __name__ == '__main__':
     import pdb
@@ -1,11 +1,11 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 import cv2
-import urllib
+import urllib.request
 import numpy as np
 import png
 import pdb
-import StringIO
+import io
 import sys
 from PIL import Image
 
@@ -32,7 +32,7 @@ def main():
 def url_to_image(url):
         # download the image, convert it to a NumPy array, and then read
         # it into OpenCV format
-        resp = urllib.urlopen(url)
+        resp = urllib.request.urlopen(url)
         image = np.asarray(bytearray(resp.read()), dtype="uint8")
         image = cv2.imdecode(image, cv2.IMREAD_COLOR)
         return image
@@ -42,17 +42,17 @@ def get_stream_raspi():
     # Code credit: Petr Kout'
     # http://petrkout.com/electronics/low-latency-0-4-s-video-streaming-from-raspberry-pi-mjpeg-streamer-opencv/
 
-    stream = urllib.urlopen('http://192.168.1.2:8080')
+    stream = urllib.request.urlopen('http://192.168.1.2:8080')
     r.read()
-    ss = ''
+    ss = b''
     while True:
         ss += stream.read(1024)
-        a = ss.find('\xff\xd8')
-        b = ss.find('\xff\xd9')
+        a = ss.find(b'\xff\xd8')
+        b = ss.find(b'\xff\xd9')
         if a != -1 and b != -1:
             jpg = ss[a:b + 2]
             ss = ss[b + 2:]
-            i = cv2.imdecode(np.fromstring(jpg, dtype=np.uint8), cv2.CV_LOAD_IMAGE_COLOR)
+            i = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
             cv2.imshow('opencv image server raspi test', i)
             if cv2.waitKey(1) == 27:
                 exit(0)
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 """ Receiver module.
 """
@@ -22,7 +22,7 @@ class Receiver(object):
         query = {
             'N': True
         }
-        self.query_json = json.dumps(query)
+        self.query_json = json.dumps(query).encode()
 
 
         try:
@@ -30,9 +30,9 @@ class Receiver(object):
             self.soc.connect(('localhost', 9001))
             self.soc.setblocking(1)
         except socket.error as e:
-            if e[0] == errno.ECONNREFUSED:
+            if e.errno == errno.ECONNREFUSED:
                 self.error_queue.put(debug.Error('receiver', 'unable to connect to receiver server'))
-            if e[0] == errno.EPIPE:
+            if e.errno == errno.EPIPE:
                 self.error_queue.put(debug.Error('receiver', 'bad pipe to receiver server'))
 
     def recv_navdata(self):
@@ -44,7 +44,7 @@ class Receiver(object):
         try:
             navdata = self.soc.recv(self.bufsize)
         except socket.error as e:
-            if e[0] == errno.ECONNREFUSED:
+            if e.errno == errno.ECONNREFUSED:
                 self.error_queue.put(debug.Error('receiver', 'unable to connect to receiver server'))
         return navdata
 
@@ -59,8 +59,8 @@ def _test_receiver():
 
     # Set up debug.
     verbosity = 1
-    error_queue = Queue.Queue()
-    debug_queue = Queue.Queue()
+    error_queue = queue.Queue()
+    debug_queue = queue.Queue()
     debugger = debug.Debug(verbosity, debug_queue, error_queue)
 
     # Set up receiver.
@@ -80,5 +80,5 @@ if __name__ == '__main__':
     import pdb
     import pprint
     import sys
-    import Queue
+    import queue
     _test_receiver()
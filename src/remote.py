@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 """ Remote control module.
 
@@ -251,8 +251,8 @@ def _test_remote():
     
     # Set up debug.
     verbosity = 1
-    error_queue = Queue.Queue()
-    debug_queue = Queue.Queue()
+    error_queue = queue.Queue()
+    debug_queue = queue.Queue()
     debugger = debug.Debug(verbosity, debug_queue, error_queue)
 
     # Set up remote.
@@ -264,7 +264,7 @@ def _test_remote():
             time.sleep(0.1)
             remote_input = remote.get_input()
             print(remote_input)
-        except Queue.Empty:
+        except queue.Empty:
             pass
         try:
             debugger.debug()
@@ -276,5 +276,5 @@ def _test_remote():
 if __name__ == '__main__':
     import pdb
     import time
-    import Queue
+    import queue
     _test_remote()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+""" Slot module.
+"""
+
+import queue
+import threading
+
+
+class LatestSlot(object):
+    """ A one item channel from a producer thread to a consumer thread which
+        always holds the latest item, so putting never blocks.
+    """
+    __slots__ = ('item', 'count', 'taken', 'held', 'event', 'lock')
+
+    def __init__(self):
+        self.item = (0, None)
+        self.count = 0
+        self.taken = 0
+        self.held = None
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+
+    def put(self, item):
+        self.count += 1
+        self.item = (self.count, item)
+        self.event.set()
+
+    def get(self, block=True, timeout=None):
+        # Works like Queue.get. Each item is tagged with a count so that it is
+        # never taken twice. The consumer holds on to the item it takes until
+        # its next get, so the item is taken and recorded as held under the
+        # lock, which in_use also takes so that a producer reusing buffers
+        # always sees which ones are in use.
+        while True:
+            if not self.event.wait(timeout if block else 0):
+                raise queue.Empty
+            self.event.clear()
+            with self.lock:
+                (count, item) = self.item
+                if count != self.taken:
+                    self.taken = count
+                    self.held = item
+                    return item
+
+    def in_use(self):
+        """ Gets the item waiting to be taken and the item held by the consumer.
+        """
+        with self.lock:
+            return (self.item[1], self.held)
+
+
+def _test_latest_slot():
+    slot = LatestSlot()
+
+    # Only the latest item is kept, and it is only taken once.
+    slot.put(1)
+    slot.put(2)
+    assert slot.get() == 2
+    try:
+        slot.get(block=False)
+        assert False
+    except queue.Empty:
+        pass
+
+    # A consumer thread sees the last item put by the producer.
+    def produce():
+        for i in range(1, 1001):
+            slot.put(i)
+    producer = threading.Thread(target=produce)
+    producer.start()
+    last = 0
+    while last != 1000:
+        item = slot.get()
+        assert item > last
+        last = item
+    producer.join()
+    print('Success.')
+
+if __name__ == '__main__':
+    _test_latest_slot()
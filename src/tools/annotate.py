@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 
 """ Contains useful functions for training.
 """
@@ -21,10 +21,10 @@ def _annotate(image, cmd, color, invert=False):
     horz = cmd['X']
     shape = image.shape
 
-    x_1 = [shape[1]/2, 0]
-    x_2 = [shape[1]/2, shape[0]]
-    y_1 = [0, shape[0]/2]
-    y_2 = [shape[1], shape[0]/2]
+    x_1 = [shape[1]//2, 0]
+    x_2 = [shape[1]//2, shape[0]]
+    y_1 = [0, shape[0]//2]
+    y_2 = [shape[1], shape[0]//2]
 
     x_1[0] += int(math.floor(horz*shape[1]/2))
     x_2[0] += int(math.floor(horz*shape[1]/2))
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Lets the user draw a bounding box around an image for input into an image
     processing algorithm.
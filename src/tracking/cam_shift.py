@@ -1,11 +1,11 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Cam shift object tracking.
 """
 
 import numpy as np
 import cv2
-import bounding_box as bb
+from . import bounding_box as bb
 
 
 class CamShift(object):
@@ -43,7 +43,7 @@ class CamShift(object):
         (ret, self.track_window) = cv2.CamShift(dst, self.track_window, self.term_crit)
 
         # Draw it on image.
-        pts = np.int0(cv2.cv.BoxPoints(ret))
+        pts = np.intp(cv2.boxPoints(ret))
         cv2.polylines(frame, [pts], True, (0, 255, 0), 2)
         # frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
         return frame
@@ -1,11 +1,11 @@
-#!/usr/bin/env python2.7
+#!/usr/bin/env python3
 
 """ Mean shift object tracking.
 """
 
 import numpy as np
 import cv2
-import bounding_box as bb
+from . import bounding_box as bb
 
 
 class MeanShift(object):